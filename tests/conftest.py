@@ -0,0 +1,37 @@
+import pytest
+
+import asyncio
+
+
+class CallbackCounter(object):
+    """
+    A minimal stand-in for the :py:class:`asyncio.Semaphore` these tests used
+    to count callbacks with.
+
+    A plain integer plus a single :py:class:`asyncio.Event` avoids the
+    per-acquire waiter/future machinery of a real Semaphore (and the
+    deprecated ``loop`` argument), keeping tests which fire many rapid
+    changes cheap.
+    """
+
+    def __init__(self):
+        self._count = 0
+        self._event = asyncio.Event()
+
+    def release(self):
+        """Record that a callback occurred."""
+        self._count += 1
+        self._event.set()
+
+    async def acquire(self):
+        """Wait for (and consume) a recorded callback."""
+        while self._count == 0:
+            self._event.clear()
+            await self._event.wait()
+        self._count -= 1
+
+
+@pytest.fixture
+def sem():
+    """A counter 'released' whenever the callback under test is called."""
+    return CallbackCounter()
@@ -1,3 +1,7 @@
+import pytest
+
+import asyncio
+
 from yarp import NoValue, file_backed_value
 
 def test_file_backed_value(tmpdir):
@@ -13,8 +17,26 @@ def test_file_backed_value(tmpdir):
     
     # Should be able to store NoValue
     v2.value = NoValue
-    assert v2.value == NoValue
+    assert v2.value is NoValue
     
     # Should be able to read it
     v3 = file_backed_value(filename, "initial")
-    assert v3.value == NoValue
+    assert v3.value is NoValue
+
+@pytest.mark.asyncio
+async def test_file_backed_value_deferred_writes(tmpdir, event_loop):
+    filename = str(tmpdir.join("test.pickle"))
+
+    v1 = file_backed_value(filename, "initial",
+                           deferred_writes=True, loop=event_loop)
+
+    # A burst of changes should not hit the disk immediately...
+    v1.value = 1
+    v1.value = 2
+    v1.value = 3
+    assert file_backed_value(filename, "other").value == "initial"
+
+    # ...but should be coalesced into a single write of the latest value on
+    # the next event loop iteration
+    await asyncio.sleep(0)
+    assert file_backed_value(filename, "other").value == 3
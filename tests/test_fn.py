@@ -1,6 +1,8 @@
+import pytest
+
 from mock import Mock
 
-from yarp import NoValue, Value, fn, instantaneous_fn
+from yarp import NoValue, Value, fn, instantaneous_fn, memo
 
 def test_no_args():
     @fn
@@ -67,6 +69,80 @@ def test_positional_kwargs():
     assert result.value == 25
 
 
+def test_raising_function_leaves_args_clean():
+    calls = []
+
+    @fn
+    def example(a, b):
+        calls.append((a, b))
+        if a == "boom":
+            raise ValueError()
+        return (a, b)
+
+    a_value = Value()
+    b_value = Value(1)
+
+    result = example(a_value, b_value)
+
+    # An exception from the function propagates to the assigning caller...
+    with pytest.raises(ValueError):
+        a_value.set_instantaneous_value("boom")
+
+    # ...but must not leave the instantaneous value cached: a later change
+    # to the other argument sees a's persistent value again
+    b_value.value = 2
+    assert calls == [(NoValue, 1), ("boom", 1), (NoValue, 2)]
+
+
+def test_memo_lazy_when_unobserved():
+    calls = []
+
+    @memo
+    def example(a, b):
+        calls.append((a, b))
+        return a - b
+
+    a_value = Value(10)
+    b_value = Value(5)
+
+    # Not called until the result is actually read
+    result = example(a_value, b_value)
+    assert calls == []
+    assert result.value == 5
+    assert calls == [(10, 5)]
+
+    # Unobserved changes don't trigger evaluation...
+    a_value.value = 20
+    a_value.value = 30
+    assert calls == [(10, 5)]
+
+    # ...until the next read
+    assert result.value == 25
+    assert calls == [(10, 5), (30, 5)]
+
+
+def test_memo_eager_when_observed():
+    m = Mock()
+    calls = []
+
+    @memo
+    def example(a, b):
+        calls.append((a, b))
+        return a - b
+
+    a_value = Value(10)
+    b_value = Value(5)
+
+    result = example(a_value, b_value)
+    result.on_value_changed(m)
+
+    # With a subscriber, changes propagate just like fn
+    a_value.value = 20
+    m.assert_called_once_with(15)
+    assert result.value == 15
+    assert calls == [(20, 5)]
+
+
 def test_inst_positional_args():
     m = Mock()
     
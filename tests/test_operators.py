@@ -1,3 +1,5 @@
+import pytest
+
 from mock import Mock
 
 from yarp import NoValue, Value, value_list, value_dict, \
@@ -52,6 +54,12 @@ def test_str_format_operator():
     fmt.value = "0x{:04X}: {!r}"
     assert stringified.value == "0x00BC: 'foo'"
 
+def test_str_format_mixed_numbering():
+    # Mixing automatic and explicit field numbering is a ValueError in
+    # str.format and must stay one through the wrapper
+    with pytest.raises(ValueError):
+        str_format("{} {0}", Value(1))
+
 def test_getattr_string_name():
     # Special attention since this is important
     m = Mock()
@@ -19,11 +19,6 @@ class TestNow(object):
         """An array of (time, value) tuples for each callback from 'now'."""
         return []
     
-    @pytest.fixture
-    def sem(self, event_loop):
-        """A semaphore released whenever the callback is called."""
-        return asyncio.Semaphore(0, loop=event_loop)
-    
     @pytest.fixture
     def t(self, interval, log, sem, event_loop):
         """'Now' value."""
@@ -60,7 +55,7 @@ class TestNow(object):
         await sem.acquire()
         assert len(log) == 2
         
-        await asyncio.sleep(0.05, loop=event_loop)
+        await asyncio.sleep(0.05)
         interval.value = 0.2
         
         await sem.acquire()
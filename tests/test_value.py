@@ -4,7 +4,7 @@ from mock import Mock
 
 from yarp import \
     NoValue, Value, value_list, value_tuple, value_dict, ensure_value, \
-    make_persistent, make_instantaneous
+    make_persistent, make_instantaneous, transaction
 
 
 def test_initial_value_default():
@@ -24,6 +24,32 @@ def test_change_callback():
     v.value = 123
     m.assert_called_once_with(123)
 
+def test_weak_callback():
+    import gc
+
+    log = []
+
+    class Consumer(object):
+        def on_change(self, new_value):
+            log.append(new_value)
+
+    v = Value()
+
+    consumer = Consumer()
+    v.on_value_changed(consumer.on_change, weak=True)
+
+    # Fires while the consumer is alive...
+    v.value = 123
+    assert log == [123]
+
+    # ...and is dropped once it is collected
+    del consumer
+    gc.collect()
+    v.value = 321
+    assert log == [123]
+    assert v._on_value_changed == ()
+
+
 def test_change_callback_only():
     m = Mock()
     
@@ -35,6 +61,121 @@ def test_change_callback_only():
     assert v.value is NoValue
 
 
+def test_distinct():
+    m = Mock()
+
+    v = Value(123, distinct=True)
+    v.on_value_changed(m)
+
+    # No-op writes should be dropped...
+    v.value = 123
+    assert len(m.mock_calls) == 0
+
+    # ...but real changes should still fire
+    v.value = 321
+    m.assert_called_once_with(321)
+    assert v.value == 321
+
+    # Instantaneous values are events, never filtered
+    v.set_instantaneous_value(321)
+    assert len(m.mock_calls) == 2
+
+
+def test_value_tuple_lazy_when_unobserved():
+    a = Value(1)
+    b = Value(2)
+
+    t = value_tuple((a, b))
+
+    # With no subscribers the tuple should still read correctly (it is only
+    # rebuilt on demand)
+    a.value = 10
+    assert t.value == (10, 2)
+    b.value = 20
+    assert t.value == (10, 20)
+
+def test_transaction():
+    ma = Mock()
+    mb = Mock()
+
+    a = Value(0)
+    b = Value(0)
+    a.on_value_changed(ma)
+    b.on_value_changed(mb)
+
+    with transaction():
+        a.value = 1
+        a.value = 2
+        b.value = 3
+
+        # Stored values update immediately but no callbacks fire yet
+        assert a.value == 2
+        assert b.value == 3
+        assert len(ma.mock_calls) == 0
+        assert len(mb.mock_calls) == 0
+
+    # On exit each changed value fires exactly once with its final value
+    ma.assert_called_once_with(2)
+    mb.assert_called_once_with(3)
+
+def test_transaction_coalesces_derived_values():
+    import yarp
+
+    @yarp.fn
+    def add(a, b):
+        return a + b
+
+    a = Value(1)
+    b = Value(2)
+    c = add(a, b)
+
+    m = Mock()
+    c.on_value_changed(m)
+
+    with transaction():
+        a.value = 10
+        b.value = 20
+
+    # The derived value should expose only the final state, not the
+    # intermediate (10 + 2) glitch
+    m.assert_called_once_with(30)
+    assert c.value == 30
+
+def test_transaction_nested():
+    m = Mock()
+
+    v = Value(0)
+    v.on_value_changed(m)
+
+    with transaction():
+        with transaction():
+            v.value = 123
+        # Inner transactions don't flush
+        assert len(m.mock_calls) == 0
+
+    m.assert_called_once_with(123)
+
+
+def test_transaction_raising_callback():
+    v = Value(0)
+
+    @v.on_value_changed
+    def raise_error(new_value):
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        with transaction():
+            v.value = 1
+
+    # The transaction machinery must have been torn down: changes to
+    # unrelated Values still fire callbacks immediately
+    other = Value(0)
+    m = Mock()
+    other.on_value_changed(m)
+    other.value = 2
+    m.assert_called_once_with(2)
+
+
 @pytest.mark.parametrize("f", [repr, str])
 def test_repr(f):
     assert f(Value(123)) == "Value(123)"
@@ -101,6 +242,26 @@ def test_value_list_instantaneous():
     m.assert_called_once_with(["A", NoValue, "c"])
 
 
+def test_value_list_patch():
+    a = Value("a")
+    b = Value()
+
+    lst = value_list([a, b])
+
+    patches = []
+    lst.on_patch(lambda index, new_value: patches.append((index, new_value)))
+
+    # Persistent changes report the index and new element...
+    a.value = "A"
+    assert patches == [(0, "A")]
+    assert lst.value == ["A", NoValue]
+
+    # ...and instantaneous changes pass through without being stored
+    b.set_instantaneous_value("b")
+    assert patches == [(0, "A"), (1, "b")]
+    assert lst.value == ["A", NoValue]
+
+
 def test_value_tuple_persistent():
     a = Value("a")
     b = Value("b")
@@ -161,6 +322,24 @@ def test_value_tuple_instantaneous():
     m.assert_called_once_with(("A", NoValue, "c"))
 
 
+def test_value_tuple_patch():
+    a = Value("a")
+    b = Value()
+
+    tup = value_tuple((a, b))
+
+    patches = []
+    tup.on_patch(lambda index, new_value: patches.append((index, new_value)))
+
+    a.value = "A"
+    assert patches == [(0, "A")]
+    assert tup.value == ("A", NoValue)
+
+    b.set_instantaneous_value("b")
+    assert patches == [(0, "A"), (1, "b")]
+    assert tup.value == ("A", NoValue)
+
+
 def test_value_dict_persistent():
     a = Value("a")
     b = Value("b")
@@ -220,6 +399,24 @@ def test_value_dict_instantaneous():
     assert dct.value == {"a": "A", "b": NoValue, "c": NoValue}
     m.assert_called_once_with({"a": "A", "b": NoValue, "c": "c"})
 
+def test_value_dict_patch():
+    a = Value("a")
+    b = Value()
+
+    dct = value_dict({"a": a, "b": b})
+
+    patches = []
+    dct.on_patch(lambda key, new_value: patches.append((key, new_value)))
+
+    a.value = "A"
+    assert patches == [("a", "A")]
+    assert dct.value == {"a": "A", "b": NoValue}
+
+    b.set_instantaneous_value("b")
+    assert patches == [("a", "A"), ("b", "b")]
+    assert dct.value == {"a": "A", "b": NoValue}
+
+
 def test_ensure_value_non_value():
     v = ensure_value(123)
     assert isinstance(v, Value)
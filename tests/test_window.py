@@ -39,6 +39,32 @@ def test_window():
     v.value = 7
     assert win.value == [6, 7]
 
+@pytest.mark.asyncio
+async def test_time_window_coalesce(event_loop, sem):
+    v = Value(1)
+    win = time_window(v, 0.1, loop=event_loop, coalesce=True)
+
+    log = []
+    def on_change(value):
+        log.append(value)
+        sem.release()
+    win.on_value_changed(on_change)
+
+    # Values inserted in the same burst...
+    v.value = 2
+    v.value = 3
+    assert win.value == [1, 2, 3]
+    assert log == [[1, 2], [1, 2, 3]]
+
+    # ...should expire in a single change event
+    await sem.acquire()
+    await sem.acquire()
+    await sem.acquire()
+    assert win.value == []
+    assert log[-1] == []
+    assert len(log) == 3
+
+
 class TestTimeWindow(object):
     
     @pytest.fixture
@@ -58,13 +84,6 @@ class TestTimeWindow(object):
         """
         return []
     
-    @pytest.fixture
-    def sem(self, event_loop):
-        """
-        A semaphore released whenever the 'win' value changes.
-        """
-        return asyncio.Semaphore(0, loop=event_loop)
-    
     @pytest.fixture
     def win(self, v, dv, sem, log, event_loop):
         """
@@ -133,7 +152,7 @@ class TestTimeWindow(object):
         v.value = 4
         assert win.value == [4]
         assert len(log) == 1
-        await asyncio.sleep(0.05, loop=event_loop)
+        await asyncio.sleep(0.05)
         
         second = time.time()
         v.value = 5
@@ -213,7 +232,7 @@ class TestTimeWindow(object):
         assert log[-2][1] == [10]
         assert log[-1][1] == [10, 11]
         
-        await asyncio.sleep(0.05, loop=event_loop)
+        await asyncio.sleep(0.05)
         assert win.value == [10, 11]
         
         # Decreasing the timeout so that the previously inserted items should have
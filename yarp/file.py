@@ -3,6 +3,8 @@ File-backed Yarp Values.
 """
 
 import asyncio
+import marshal
+import os
 import pickle
 import traceback
 
@@ -12,22 +14,45 @@ __names__ = [
     "file_backed_value",
 ]
 
-def file_backed_value(filename, initial_value=NoValue):
+# On-disk format: a one-byte tag followed by the encoded value. Values
+# marshal supports (plain scalars and containers of them) take the C-speed
+# marshal path; everything else falls back to pickle. Untagged files (from
+# older versions, which wrote a bare pickle) are still readable.
+_MARSHAL_TAG = b"m"
+_PICKLE_TAG = b"p"
+
+def file_backed_value(filename, initial_value=NoValue,
+                      deferred_writes=False, loop=None):
     """
     A persistent, file-backed value.
-    
+
     Upon creation, the value will be loaded from the specified filename.
     Whenever the value is changed it will be rewritten to disk. Changes made to
     the file while your program is running will be ignored.
-    
+
     If the file does not exist, it will be created and the value set to
     the value given by `initial_value`.
-    
+
+    If ``deferred_writes`` is True, writes are deferred until the next
+    iteration of the event loop with rapid bursts of changes coalesced into a
+    single write of the latest value. The ``loop`` argument should be the
+    :py:class:`asyncio.BaseEventLoop` used to schedule the writes. If
+    ``None``, the default loop is used. Both arguments are ignored when
+    ``deferred_writes`` is False (the default) and every change is written
+    out immediately.
+
     The value must be pickleable.
     """
     try:
         with open(filename, "rb") as f:
-            source_value = Value(pickle.load(f))
+            data = f.read()
+        if data[:1] == _MARSHAL_TAG:
+            source_value = Value(marshal.loads(data[1:]))
+        elif data[:1] == _PICKLE_TAG:
+            source_value = Value(pickle.loads(data[1:]))
+        else:
+            # Legacy file: a bare pickle with no tag byte
+            source_value = Value(pickle.loads(data))
     except FileNotFoundError:
         # If the file doesn't exist, use the initial value
         source_value = Value(initial_value)
@@ -37,13 +62,48 @@ def file_backed_value(filename, initial_value=NoValue):
         traceback.print_exc()
         source_value = Value(initial_value)
     
+    # Written then atomically renamed over the real file so a crash
+    # mid-write can never leave a truncated state file behind.
+    tmp_filename = "{}.tmp".format(filename)
+
+    def write_value(value):
+        try:
+            data = _MARSHAL_TAG + marshal.dumps(value)
+        except ValueError:
+            # Not a marshallable type (e.g. NoValue or arbitrary objects).
+            # The newest pickle protocol is substantially faster and more
+            # compact than the default; the protocol is recorded in the
+            # stream so loading needs no changes.
+            data = _PICKLE_TAG + pickle.dumps(value,
+                                              protocol=pickle.HIGHEST_PROTOCOL)
+        with open(tmp_filename, "wb") as f:
+            f.write(data)
+        os.replace(tmp_filename, filename)
+
     # Store changes to disk
-    @source_value.on_value_changed
-    def on_value_changed(new_value):
-        with open(filename, "wb") as f:
-            pickle.dump(new_value, f)
-    
+    if deferred_writes:
+        loop = loop or asyncio.get_event_loop()
+        write_scheduled = False
+
+        def flush():
+            nonlocal write_scheduled
+            write_scheduled = False
+            write_value(source_value.value)
+
+        @source_value.on_value_changed
+        def on_value_changed(new_value):
+            # Coalesce bursts of changes into one write of the latest value
+            # per event loop iteration.
+            nonlocal write_scheduled
+            if not write_scheduled:
+                write_scheduled = True
+                loop.call_soon(flush)
+    else:
+        @source_value.on_value_changed
+        def on_value_changed(new_value):
+            write_value(new_value)
+
     # Immediately trigger a store (incase the file did not exist yet)
-    on_value_changed(source_value.value)
-    
+    write_value(source_value.value)
+
     return source_value
@@ -4,12 +4,14 @@ Wrappers for making reactive Python functions which accept and produce
 """
 
 import functools
+import types
 
 from yarp import NoValue, Value, ensure_value
 
 __names__ = [
     "fn",
     "instantaneous_fn",
+    "memo",
 ]
 
 def _function_call_on_argument_value_change(call_immediately, callback,
@@ -33,48 +35,172 @@ def _function_call_on_argument_value_change(call_immediately, callback,
     """
     args = []
     kwargs = {}
-    
-    def get_args_kwargs():
-        """
-        Return an (args, kwargs) tuple containing the current underlying values
-        of the arg/kwarg :py:class:`Value` objects.
-        """
-        a = [a.value for a in args]
-        k = {k: a.value for k, a in kwargs.items()}
-        
-        return (a, k)
-    
+
+    # The current underlying value of each arg/kwarg Value, kept in sync by
+    # the change callbacks below. Updating one slot per change (rather than
+    # rebuilding a fresh list and dict from every argument's .value, as
+    # previously) makes a single-argument change O(1) in the number of
+    # arguments.
+    arg_vals = []
+    kwarg_vals = {}
+
     def on_arg_changed(index, value):
         """Callback on an argument :py:class:`Value` changing."""
-        args, kwargs = get_args_kwargs()
-        args[index] = value
-        
-        callback(*args, **kwargs)
-    
+        # Show the delivered (possibly instantaneous) value to the callback,
+        # then leave the slot holding the underlying persistent value. The
+        # restore must happen even if the callback raises (exceptions
+        # propagate to the assigning caller) or later calls would reuse the
+        # stale event value.
+        arg_vals[index] = value
+        try:
+            callback(*arg_vals, **kwarg_vals)
+        finally:
+            arg_vals[index] = args[index].value
+
     def on_kwarg_changed(key, value):
         """Callback on a keyword argument :py:class:`Value` changing."""
-        args, kwargs = get_args_kwargs()
-        kwargs[key] = value
-        
-        callback(*args, **kwargs)
-    
+        kwarg_vals[key] = value
+        try:
+            callback(*arg_vals, **kwarg_vals)
+        finally:
+            kwarg_vals[key] = kwargs[key].value
+
     # Wrap all args/kwargs in Value objects, if not already, and subscribe
     # to changes
     for i, arg in enumerate(map(ensure_value, value_args)):
         args.append(arg)
+        arg_vals.append(arg.value)
         arg.on_value_changed(functools.partial(on_arg_changed, i))
-    
+
     for key, arg in value_kwargs.items():
         arg = ensure_value(arg)
         kwargs[key] = arg
+        kwarg_vals[key] = arg.value
         arg.on_value_changed(functools.partial(on_kwarg_changed, key))
-    
+
     if call_immediately:
-        a, k = get_args_kwargs()
-        callback(*a, **k)
+        callback(*arg_vals, **kwarg_vals)
     
 
 
+# Note: no class docstring since '__doc__' must appear in __slots__ so that
+# the wrapped function's docstring (and the annotations python_operators
+# adds) can be attached to each wrapper instance.
+class _FnWrapper(object):
+    # A slotted class rather than a decorator closure: calls skip the
+    # closure-cell indirection and instances carry no __dict__.
+    __slots__ = ("_f", "_instantaneous", "_memo",
+                 "__doc__", "__name__", "__qualname__", "__wrapped__")
+
+    def __init__(self, f, instantaneous, memo=False):
+        self._f = f
+        self._instantaneous = instantaneous
+        self._memo = memo
+        # The subset of functools.wraps which makes sense for instances
+        self.__doc__ = f.__doc__
+        self.__name__ = getattr(f, "__name__", repr(f))
+        self.__qualname__ = getattr(f, "__qualname__", self.__name__)
+        self.__wrapped__ = f
+
+    def __call__(self, *args, **kwargs):
+        f = self._f
+
+        if self._memo:
+            return self._call_memo(args, kwargs)
+
+        output_value = Value()
+
+        if self._instantaneous:
+            def callback(*args, **kwargs):
+                output_value.set_instantaneous_value(f(*args, **kwargs))
+
+            _function_call_on_argument_value_change(
+                False, callback, *args, **kwargs)
+        else:
+            first_call = True
+
+            def callback(*args, **kwargs):
+                nonlocal first_call
+                if first_call:
+                    first_call = False
+                    output_value._value = f(*args, **kwargs)
+                else:
+                    output_value.value = f(*args, **kwargs)
+
+            _function_call_on_argument_value_change(
+                True, callback, *args, **kwargs)
+
+        return output_value
+
+    def _call_memo(self, args, kwargs):
+        f = self._f
+        # The most recently delivered argument values, updated on every
+        # change and consumed when (and if) an evaluation happens.
+        pending = ((), {})
+
+        def recompute():
+            a, k = pending
+            return f(*a, **k)
+
+        output_value = _MemoValue(recompute)
+
+        def callback(*args, **kwargs):
+            nonlocal pending
+            pending = (args, kwargs)
+            output_value._inputs_changed()
+
+        _function_call_on_argument_value_change(
+            True, callback, *args, **kwargs)
+
+        return output_value
+
+    def __get__(self, obj, objtype=None):
+        # Bind like a plain function would: python_operators installs these
+        # wrappers as Value's operator methods and the interpreter only
+        # prepends 'self' for attributes supporting the descriptor protocol.
+        if obj is None:
+            return self
+        return types.MethodType(self, obj)
+
+    def __repr__(self):
+        return "<{} {}>".format(type(self).__name__, self.__name__)
+
+
+class _MemoValue(Value):
+    """
+    The continuous :py:class:`Value` returned by :py:func:`memo`.
+
+    While nobody is subscribed via :py:meth:`on_value_changed`, input
+    changes merely mark this value stale and the wrapped function is only
+    re-evaluated when :py:attr:`value` is next read. Once a subscriber is
+    registered, evaluation is eager again (as for :py:func:`fn`) so that
+    change propagation works as usual.
+    """
+
+    __slots__ = ("_recompute", "_dirty")
+
+    def __init__(self, recompute):
+        super().__init__()
+        self._recompute = recompute
+        self._dirty = True
+
+    @Value.value.getter
+    def value(self):
+        # Materialize any evaluation deferred while nobody was subscribed
+        if self._dirty:
+            self._dirty = False
+            self._value = self._recompute()
+        return self._value
+
+    def _inputs_changed(self):
+        """Internal. Called whenever any wrapped argument changes."""
+        if self._on_value_changed:
+            self._dirty = False
+            self.value = self._recompute()
+        else:
+            self._dirty = True
+
+
 def fn(f):
     """
     Decorator. Wraps a function so that it may be called with :py:class:`Value`
@@ -110,23 +236,7 @@ def fn(f):
     
     See also: :py:func:`instantaneous_fn`.
     """
-    @functools.wraps(f)
-    def instance_maker(*args, **kwargs):
-        output_value = Value()
-        first_call = True
-        def callback(*args, **kwargs):
-            nonlocal first_call
-            if first_call:
-                first_call = False
-                output_value._value = f(*args, **kwargs)
-            else:
-                output_value.value = f(*args, **kwargs)
-        
-        _function_call_on_argument_value_change(
-            True, callback, *args, **kwargs)
-        return output_value
-    
-    return instance_maker
+    return _FnWrapper(f, False)
 
 def instantaneous_fn(f):
     """
@@ -136,14 +246,22 @@ def instantaneous_fn(f):
     The only other difference is that the function will not be called
     immediately and instead will only be called later when its inputs change.
     """
-    @functools.wraps(f)
-    def instance_maker(*args, **kwargs):
-        output_value = Value()
-        def callback(*args, **kwargs):
-            output_value.set_instantaneous_value(f(*args, **kwargs))
-        
-        _function_call_on_argument_value_change(
-            False, callback, *args, **kwargs)
-        return output_value
-    
-    return instance_maker
+    return _FnWrapper(f, True)
+
+def memo(f):
+    """
+    Decorator. Like :py:func:`fn` but lazily evaluated: while no callback is
+    subscribed to the returned :py:class:`Value`, input changes simply mark
+    it stale and ``f`` is only (re)called when :py:attr:`Value.value` is
+    actually read. Once a callback is registered evaluation becomes eager
+    again so changes propagate as for :py:func:`fn`.
+
+    This suits expensive pure functions of rapidly-changing inputs whose
+    result is only sampled occasionally: the number of evaluations is
+    bounded by the number of reads, not the number of input changes.
+
+    ``f`` should be pure (it may be called fewer times, and at later
+    moments, than with :py:func:`fn`). The returned :py:class:`Value` is
+    persistent.
+    """
+    return _FnWrapper(f, False, memo=True)
@@ -2,6 +2,8 @@
 General purpose utility functions for manipulating :py:class:`Value` values.
 """
 
+from collections import deque
+
 from yarp import NoValue, Value, fn, ensure_value
 
 __names__ = [
@@ -26,25 +28,34 @@ def window(source_value, num_values):
     is always assumed to be an integer greater than zero and never ``NoValue``.
     """
     source_value = ensure_value(source_value)
-    output_value = Value([source_value.value])
-    
     num_values = ensure_value(num_values)
     assert num_values.value >= 1
-    
+
+    # Internal state is a bounded deque: appends are O(1) with truncation
+    # handled by maxlen, rather than the O(N) concatenate-and-slice of a
+    # list. Subscribers (and .value) still see list snapshots.
+    values = deque([source_value.value], maxlen=num_values.value)
+    output_value = Value(list(values))
+
     @source_value.on_value_changed
     def on_source_value_changed(new_value):
         """Internal. Insert incoming Value into the window."""
-        output_value.value = (output_value.value + [new_value])[-num_values.value:]
-    
+        values.append(new_value)
+        output_value.value = list(values)
+
     @num_values.on_value_changed
     def on_num_values_changed(_instantaneous_new_num_values):
         """Internal. Handle window size changes."""
-        # Truncate the window data if required
+        nonlocal values
         new_num_values = num_values.value
         assert new_num_values >= 1
-        if len(output_value.value) > new_num_values:
-            output_value.value = output_value.value[-new_num_values:]
-    
+        if new_num_values != values.maxlen:
+            truncated = len(values) > new_num_values
+            values = deque(values, maxlen=new_num_values)
+            # Only report a change if the resize dropped values
+            if truncated:
+                output_value.value = list(values)
+
     return output_value
 
 def no_repeat(source_value):
@@ -62,33 +73,57 @@ def no_repeat(source_value):
     @source_value.on_value_changed
     def on_source_value_changed(new_value):
         nonlocal last_value
-        if new_value != last_value:
-            last_value = new_value
-            # Copy to output whether continuous or instantaneous
-            output_value._value = source_value.value
-            output_value.set_instantaneous_value(new_value)
+        # Identity first: upstream frequently re-emits the very same object
+        # (or an interned scalar) and 'is' settles that in a pointer compare
+        # without invoking __eq__.
+        if new_value is last_value or new_value == last_value:
+            return
+        last_value = new_value
+        # Copy to output whether continuous or instantaneous. The slot is
+        # read directly: the property descriptor adds nothing here and this
+        # runs per change. (new_value cannot be used instead: it is the
+        # instantaneous value, which differs for instantaneous sources.)
+        output_value._value = source_value._value
+        output_value.set_instantaneous_value(new_value)
     
     return output_value
 
 
+def _rule_not_novalue(value):
+    """Internal. The default filter rule: retain everything but NoValue."""
+    return value is not NoValue
+
+def _rule_truthy(value):
+    """Internal. The ``None`` filter rule: retain truthy, non-NoValue
+    values."""
+    return value is not NoValue and bool(value)
+
+def _compile_rule(rule):
+    """Internal. Specialise a filter rule into a single-argument predicate.
+
+    Resolving which kind of rule was given (NoValue/None/callable) once,
+    up-front, leaves a branch-free predicate to call on every change.
+    """
+    if rule is NoValue:
+        return _rule_not_novalue
+    elif rule is None:
+        return _rule_truthy
+    else:
+        return rule
+
 def _check_value(value, rule):
     """Internal. Test a value, return whether it should be retained or
     not according to the provided rule.
-    
+
     If the rule is NoValue, returns True for non-NoValue values, including None
     or falsey values.
-    
+
     If the rule is None, returns True for non-NoValue values which are truthy.
-    
+
     If the rule is a function, calls it with the value and expects a boolean to
     be returned.
     """
-    if rule is NoValue:
-        return value is not NoValue
-    elif rule is None:
-        return value is not NoValue and bool(value)
-    else:
-        return rule(value)
+    return _compile_rule(rule)(value)
 
 
 def filter(source_value, rule=NoValue):
@@ -106,16 +141,19 @@ def filter(source_value, rule=NoValue):
     ``NoValue`` will be filtered out.
     """
     source_value = ensure_value(source_value)
+    check = _compile_rule(rule)
     output_value = Value(
         source_value.value
         if (source_value.value is not NoValue and
-            _check_value(source_value.value, rule))
+            check(source_value.value))
         else NoValue)
-    
+
     @source_value.on_value_changed
     def on_source_value_changed(new_value):
-        if _check_value(new_value, rule):
-            output_value._value = source_value.value
+        if check(new_value):
+            # Slot read, as in no_repeat: the persistent value must come
+            # from the source (new_value may be instantaneous)
+            output_value._value = source_value._value
             output_value.set_instantaneous_value(new_value)
     
     return output_value
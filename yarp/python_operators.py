@@ -8,6 +8,82 @@ from yarp.function_wrappers import Value, fn, instantaneous_fn
 
 import operator
 import builtins
+import re
+import string
+
+_str_formatter = string.Formatter()
+
+# Cache of format string -> parsed segments (or None where the format uses
+# features the fast path in _str_format does not reproduce). str.format
+# re-parses its format string on every call but in a reactive graph the
+# format is usually fixed while its arguments change, so the parse is worth
+# caching. The format may itself be a changing Value, however, so the cache
+# is bounded: as in re._cache it is simply cleared when full, which is
+# cheaper per hit than LRU bookkeeping and degrades to one re-parse per
+# call for pathological (always-distinct) format strings.
+_str_format_cache = {}
+_STR_FORMAT_MAXCACHE = 512
+
+# Field names the fast path supports: automatic ("")/explicit positional
+# numbering or a plain keyword name. Anything else (attribute or index
+# access) is left to str.format.
+_simple_field_name = re.compile(r"([0-9]*|[A-Za-z_][A-Za-z0-9_]*)$")
+
+def _str_format(fmt, *args, **kwargs):
+    """
+    Equivalent to ``fmt.format(*args, **kwargs)`` but with the parsed form of
+    the format string cached between calls.
+    """
+    parsed = _str_format_cache.get(fmt, False)
+    if parsed is False:
+        parsed = []
+        uses_auto = uses_manual = False
+        for segment in _str_formatter.parse(fmt):
+            _literal_text, field_name, format_spec, _conversion = segment
+            if field_name is not None and (
+                    not _simple_field_name.match(field_name) or
+                    "{" in format_spec):
+                # Too clever for the fast path below: remember to always use
+                # str.format for this format string.
+                parsed = None
+                break
+            if field_name == "":
+                uses_auto = True
+            elif field_name is not None and field_name.isdigit():
+                uses_manual = True
+            parsed.append(segment)
+        if parsed is not None and uses_auto and uses_manual:
+            # str.format rejects mixed automatic and explicit numbering with
+            # a ValueError; route such strings to it so they fail identically
+            # rather than formatting here.
+            parsed = None
+        # builtins.len: the wrapping loop below shadows len in this module's
+        # namespace with the Value-returning version
+        if builtins.len(_str_format_cache) >= _STR_FORMAT_MAXCACHE:
+            _str_format_cache.clear()
+        _str_format_cache[fmt] = parsed
+
+    if parsed is None:
+        return fmt.format(*args, **kwargs)
+
+    result = []
+    auto_index = 0
+    for literal_text, field_name, format_spec, conversion in parsed:
+        if literal_text:
+            result.append(literal_text)
+        if field_name is None:
+            continue
+        if field_name == "":
+            obj = args[auto_index]
+            auto_index += 1
+        elif field_name.isdigit():
+            obj = args[int(field_name)]
+        else:
+            obj = kwargs[field_name]
+        if conversion:
+            obj = _str_formatter.convert_field(obj, conversion)
+        result.append(format(obj, format_spec))
+    return "".join(result)
 
 # Functions from the operator module to wrap.
 wrapped_operator_functions = [
@@ -63,9 +139,7 @@ wrapped_functions = [
     ("sorted", sorted, "sorted"),
     ("str", str, "str"),
     ("repr", repr, "repr"),
-    ("str_format",
-        lambda a, *args, **kwargs: a.format(*args, **kwargs),
-        "str.format(...)"),
+    ("str_format", _str_format, "str.format(...)"),
     ("oct", oct, "oct"),
     ("hex", hex, "hex"),
     ("zip", zip, "zip"),
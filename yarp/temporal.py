@@ -4,6 +4,8 @@ Temporal filters for :py:class:`Value` values.
 
 import asyncio
 
+from collections import deque
+
 from yarp import NoValue, Value, ensure_value
 
 __names__ = [
@@ -32,61 +34,76 @@ def delay(source_value, delay_seconds, loop=None):
     delay_seconds = ensure_value(delay_seconds)
     output_value = Value(source_value.value)
     
-    # An array of (insertion_time, value, instantaneous_value, handle)
-    # tuples for values due to be sent.
-    timers = []
-    
+    # A FIFO of (insertion_time, value, instantaneous_value) tuples for
+    # values due to be sent, oldest first. A deque: values leave from the
+    # front and popleft is O(1) where list.pop(0) shuffles the whole queue.
+    #
+    # Since every value gets the same delay, output order is insertion
+    # order: as in time_window, a single timer armed for the head value's
+    # deadline replaces one asyncio TimerHandle per queued value (and the
+    # cancel/reschedule churn of all of them when the delay changes).
+    timers = deque()
+    timer_handle = None
+
+    # The loop is looked up once, here, rather than per-change: an
+    # asyncio.get_event_loop() call (a thread-local lookup) per scheduled
+    # change adds up in rapidly-changing graphs. The scheduling methods are
+    # bound once for the same reason.
     loop = loop or asyncio.get_event_loop()
-    
-    def pop_value():
-        """Internal. Outputs a previously delayed value."""
-        insertion_time, value, instantaneous_value, handle = timers.pop(0)
-        output_value._value = value
-        output_value.set_instantaneous_value(instantaneous_value)
-    
+    loop_time = loop.time
+    loop_call_at = loop.call_at
+    loop_call_soon = loop.call_soon
+
+    def pop_values():
+        """
+        Internal. Output every value now due (one change event each) and
+        rearm the timer for the next one due.
+        """
+        nonlocal timer_handle
+        if timer_handle is not None:
+            # Harmless when called by the timer itself
+            timer_handle.cancel()
+            timer_handle = None
+
+        now = loop_time()
+        max_age = delay_seconds._value
+        while timers and now - timers[0][0] >= max_age:
+            insertion_time, value, instantaneous_value = timers.popleft()
+            output_value._value = value
+            output_value.set_instantaneous_value(instantaneous_value)
+
+        if timers:
+            timer_handle = loop_call_at(timers[0][0] + max_age, pop_values)
+
     @source_value.on_value_changed
     def on_source_value_changed(instantaneous_value):
         """Internal. Schedule an incoming value to be output later."""
-        insertion_time = loop.time()
-        handle = loop.call_at(insertion_time + delay_seconds.value,
-                              pop_value)
-        timers.append((insertion_time, source_value.value, instantaneous_value, handle))
-    
+        nonlocal timer_handle
+        insertion_time = loop_time()
+        timers.append((insertion_time, source_value._value, instantaneous_value))
+        if timer_handle is None:
+            # Queue was empty: this value defines the next deadline.
+            # Otherwise an older value is already armed and will rearm for
+            # us when it is output.
+            dt = delay_seconds._value
+            if dt <= 0:
+                # Zero delay: call_soon appends to the ready deque in O(1),
+                # skipping the timer heap entirely.
+                timer_handle = loop_call_soon(pop_values)
+            else:
+                timer_handle = loop_call_at(insertion_time + dt, pop_values)
+
     @delay_seconds.on_value_changed
     def on_delay_seconds_changed(new_delay_seconds):
         """Internal. Handle the delay changing."""
-        nonlocal timers
-        
-        now = loop.time()
-        max_age = delay_seconds.value
-        
-        # Expire any delayed values which should have been removed by now
-        while timers:
-            insertion_time, value, instantaneous_value, handle = timers[0]
-            age = now - insertion_time
-            if age >= max_age:
-                handle.cancel()
-                pop_value()
-            else:
-                # If this timer is young enough, all others inserted after it
-                # must also be young enough.
-                break
-        
-        # Update the timeouts of the remaining timers
-        def update_timer(it_v_iv_h):
-            insertion_time, value, instantaneous_value, handle = it_v_iv_h
-            handle.cancel()
-            return (insertion_time,
-                    value,
-                    instantaneous_value,
-                    loop.call_at(insertion_time + delay_seconds.value,
-                                 pop_value))
-        timers = list(map(update_timer, timers))
+        # Output anything the new delay makes overdue and rearm for the
+        # (possibly changed) head deadline.
+        pop_values()
     
     return output_value
 
 
-def time_window(source_value, duration, loop=None):
+def time_window(source_value, duration, loop=None, coalesce=False):
     """Produce a moving window over a :py:class:`Value`'s historical values
     within a given time period.
     
@@ -99,74 +116,82 @@ def time_window(source_value, duration, loop=None):
     seconds greater than zero and never be ``NoValue``. If the value is
     reduced, previously inserted values will be expired earlier, possibly
     immediately if they should already have expired. If the value is increased,
-    previously inserted values will have an increased timeout.
+    previously inserted values will have an increased timeout. Durations are
+    measured on the event loop's monotonic clock (:py:meth:`loop.time`), not
+    the wall clock, so they are immune to system clock adjustments.
     
     The ``loop`` argument should be an :py:class:`asyncio.BaseEventLoop` in
     which windowing will be scheduled. If ``None``, the default loop is used.
+
+    If ``coalesce`` is True, values which expire together (within one pass of
+    the expiry handler, e.g. values which were inserted in the same burst)
+    are removed in a single change event rather than one event per value.
     """
     
     source_value = ensure_value(source_value)
     output_value = Value([source_value.value])
-    
-    # A queue of (insertion_time, handle) pairs for calls to expire values currently
-    # in the window.
-    timers = []
-    
+
     duration = ensure_value(duration)
     loop = loop or asyncio.get_event_loop()
-    
-    def expire_value():
-        """Internal. Removes a value from the window."""
-        timers.pop(0)
-        output_value.value = output_value.value[1:]
-    
-    def schedule_value_expiration():
+    loop_time = loop.time
+    loop_call_at = loop.call_at
+
+    # The insertion time of each value currently in the window, oldest first.
+    # Since every value gets the same duration, expiry order is insertion
+    # order: rather than one asyncio timer per inserted value, a single
+    # timer armed for the oldest value's deadline suffices (rearmed as
+    # values expire or the duration changes).
+    insertion_times = deque()
+    timer_handle = None
+
+    def expire_values():
         """
-        Internal. Drop a newly-inserted value from the window after the window
-        delay occurs.
+        Internal. Expire every value now overdue (one change event each, as
+        if each had its own timer) and rearm the timer for the next one due.
         """
-        now = loop.time()
-        t = now + duration.value
-        timers.append((now, loop.call_at(t, expire_value)))
-    
+        nonlocal timer_handle
+        if timer_handle is not None:
+            # Harmless when called by the timer itself
+            timer_handle.cancel()
+            timer_handle = None
+
+        now = loop_time()
+        max_age = duration._value
+        expired = 0
+        while insertion_times and now - insertion_times[0] >= max_age:
+            insertion_times.popleft()
+            expired += 1
+            if not coalesce:
+                output_value.value = output_value._value[1:]
+        if coalesce and expired:
+            output_value.value = output_value._value[expired:]
+
+        if insertion_times:
+            timer_handle = loop_call_at(insertion_times[0] + duration._value,
+                                        expire_values)
+
     @source_value.on_value_changed
     def on_source_value_changed(new_value):
         """Internal. Adds the new value to the window when the input changes."""
-        output_value.value = output_value.value + [new_value]
-        schedule_value_expiration()
-    
+        output_value.value = output_value._value + [new_value]
+        insertion_times.append(loop_time())
+        if timer_handle is None:
+            # Window was empty: this value defines the next deadline.
+            # Otherwise an older value is already armed and will rearm for
+            # us when it expires.
+            expire_values()
+
     @duration.on_value_changed
     def on_duration_changed(_instantaneous_new_duration):
         """Internal. Handle changes in the specified window duration."""
-        nonlocal timers
-        # Immediately expire any values in the window older than the new
-        # duration.
-        now = loop.time()
-        new_duration = duration.value
-        while timers:
-            insertion_time, handle = timers[0]
-            age = now - insertion_time
-            if age > new_duration:
-                handle.cancel()
-                expire_value()  # Side effect: removes handle from timers
-            else:
-                # Since the _timers array is in order, as soon as we encounter
-                # a young enough timer, all others after it will be younger
-                # still.
-                break
-        
-        # Modify the timeouts of all previously inserted values
-        def modify_timeout(insertion_time_and_handle):
-            insertion_time, handle = insertion_time_and_handle
-            handle.cancel()
-            
-            return (insertion_time,
-                    loop.call_at(insertion_time + new_duration,
-                                 expire_value))
-        timers = [modify_timeout(t) for t in timers]
-    
-    schedule_value_expiration()
-    
+        # Expire anything the new duration makes overdue and rearm for the
+        # (possibly changed) head deadline.
+        expire_values()
+
+    # Expire the initial value after the window delay
+    insertion_times.append(loop_time())
+    expire_values()
+
     return output_value
 
 def rate_limit(source_value, min_interval=0.1, loop=None):
@@ -186,88 +211,83 @@ def rate_limit(source_value, min_interval=0.1, loop=None):
     output_value = Value(source_value.value)
     
     min_interval = ensure_value(min_interval)
+
+    # As in delay: resolve the loop and bind its scheduling methods once
+    # rather than per change.
     loop = loop or asyncio.get_event_loop()
-    
-    # The last value to be received from the source
-    last_value = None
-    
-    # Was last_value blocked from being sent due to the rate limit?
-    last_value_blocked = False
-    
-    # The time (according to asyncio) the last blockage started. The
-    # blockage will be cleared min_interval.delay seconds after this
+    loop_time = loop.time
+    loop_call_at = loop.call_at
+
+    # The time the last value was passed through, and the deadline before
+    # which subsequent values are held back. The deadline is fixed when a
+    # value is output (or the interval changes while the gate is open):
+    # interval changes after it has passed are not retroactive. -inf means
+    # "never", so the next value passes straight through. For persistent
+    # values the initial value counts as having been output at construction
     # time.
-    last_block_start = None
-    
-    # The asyncio timer handle for the current blockage timer
+    if source_value.value is not NoValue:
+        last_emit_time = loop_time()
+        next_allowed = last_emit_time + min_interval.value
+    else:
+        last_emit_time = next_allowed = float("-inf")
+
+    # The most recent value held back by the rate limit, if any. No asyncio
+    # timer exists except while such a value is waiting: in the common case
+    # of a source naturally slower than min_interval each change costs only
+    # a clock read and a comparison, with no timer scheduled and cancelled
+    # per event.
+    pending_value = None
+    has_pending = False
     timer_handle = None
-    
-    # Is the rate limit currently being applied? (Initially yes for
-    # persistant values, otherwise no)
-    blocked = source_value.value is not NoValue
-    
-    def clear_blockage():
-        """Internal. Timeout expired callback."""
-        nonlocal blocked, last_value, last_value_blocked, last_block_start, timer_handle
-        if last_value_blocked:
-            # Pass the delayed value through
-            output_value._value = source_value.value
-            output_value.set_instantaneous_value(last_value)
-            last_value = None
-            last_value_blocked = False
-            
-            # Start the blockage again
-            block()
-        else:
-            # No values queued up, just unblock
-            blocked = False
-            last_block_start = None
-            timer_handle = None
-    
-    def block():
-        """Setup a timer to unblock the rate_limit and output the last
-        value."""
-        nonlocal blocked, last_block_start, timer_handle
-        blocked = True
-        last_block_start = loop.time()
-        timer_handle = loop.call_at(
-            last_block_start + min_interval.value,
-            clear_blockage)
-    
+
+    def flush():
+        """Internal. Output the held-back value, restarting the limit."""
+        nonlocal last_emit_time, next_allowed
+        nonlocal pending_value, has_pending, timer_handle
+        timer_handle = None
+        if has_pending:
+            value = pending_value
+            pending_value = None
+            has_pending = False
+            last_emit_time = loop_time()
+            next_allowed = last_emit_time + min_interval._value
+            output_value._value = source_value._value
+            output_value.set_instantaneous_value(value)
+
     @source_value.on_value_changed
     def on_source_value_changed(new_value):
-        nonlocal last_value, last_value_blocked
-        if not blocked:
+        nonlocal last_emit_time, next_allowed
+        nonlocal pending_value, has_pending, timer_handle
+        now = loop_time()
+        if now >= next_allowed:
             # Pass the value change through
-            output_value._value = source_value.value
+            last_emit_time = now
+            next_allowed = now + min_interval._value
+            output_value._value = source_value._value
             output_value.set_instantaneous_value(new_value)
-            
-            # Start a timeout
-            block()
         else:
-            # Keep the value back until we're unblocked
-            last_value = new_value
-            last_value_blocked = True
-    
+            # Keep the value back until the interval is up
+            pending_value = new_value
+            has_pending = True
+            if timer_handle is None:
+                timer_handle = loop_call_at(next_allowed, flush)
+
     @min_interval.on_value_changed
     def on_min_interval_changed(instantaneous_min_interval):
-        nonlocal timer_handle
-        now = loop.time()
-        if not blocked:
-            # No blockage in progress, nothing to do
-            pass
-        elif now - last_block_start >= min_interval.value:
-            # New timeout has already expired, unblock immediately
-            timer_handle.cancel()
-            clear_blockage()
-        else:
-            # Reset timer for new time
+        nonlocal timer_handle, next_allowed
+        now = loop_time()
+        if now >= next_allowed:
+            # Gate already open: the change is not retroactive
+            return
+        next_allowed = last_emit_time + min_interval.value
+        if timer_handle is not None:
+            # Move the deadline for the held-back value
             timer_handle.cancel()
-            timer_handle = loop.call_at(
-                last_block_start + min_interval.value,
-                clear_blockage)
-    
-    if blocked:
-        block()
+            timer_handle = None
+            if now >= next_allowed:
+                # New interval has already expired, output immediately
+                flush()
+            else:
+                timer_handle = loop_call_at(next_allowed, flush)
 
     return output_value
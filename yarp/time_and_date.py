@@ -25,29 +25,78 @@ def now(interval=1.0, tz=None, loop=None):
     
     The ``loop`` argument should be an :py:class:`asyncio.BaseEventLoop` in
     which the delays will be scheduled. If ``None``, the default loop is used.
+
+    The refresh timer only starts once a change callback is registered;
+    until then reads of the value just return the current time directly.
     """
+    # Resolve the loop and bind its scheduling methods once: this runs once
+    # per update for the lifetime of the returned Value.
     loop = loop or asyncio.get_event_loop()
+    loop_time = loop.time
+    loop_call_at = loop.call_at
     interval = ensure_value(interval)
-    
-    v = Value()
+
     timer_handle = None
-    next_update_time = loop.time()
-    
+    next_update_time = None
+
     def update_time():
         nonlocal next_update_time, timer_handle
-        
+
         v.value = _datetime.datetime.now(tz)
         next_update_time += interval.value
-        timer_handle = loop.call_at(next_update_time, update_time)
-    update_time()
-    
+        timer_handle = loop_call_at(next_update_time, update_time)
+
+    def start_ticking():
+        """Internal. Begin the update cycle on the first subscription."""
+        nonlocal next_update_time
+        if next_update_time is None:
+            next_update_time = loop_time()
+            update_time()
+
+    def read_time():
+        """Internal. The current time, for reads before ticking starts."""
+        return _datetime.datetime.now(tz)
+
+    v = _NowValue(start_ticking, read_time)
+
     @interval.on_value_changed
     def on_interval_changed(new_interval):
         nonlocal next_update_time, timer_handle
-        
-        if timer_handle is not None:
-            timer_handle.cancel()
-        next_update_time = loop.time() + interval.value
-        timer_handle = loop.call_at(next_update_time, update_time)
+
+        if timer_handle is None:
+            # Not ticking yet: the new interval is simply picked up when
+            # the first subscriber starts the cycle
+            return
+        timer_handle.cancel()
+        next_update_time = loop_time() + interval.value
+        timer_handle = loop_call_at(next_update_time, update_time)
     
     return v
+
+
+class _NowValue(Value):
+    """
+    The :py:class:`Value` returned by :py:func:`now`.
+
+    No update timer runs until the first change callback is registered:
+    until then reads of :py:attr:`value` simply compute the current time on
+    demand, so an unobserved clock costs nothing per interval.
+    """
+
+    __slots__ = ("_start_ticking", "_read_time")
+
+    def __init__(self, start_ticking, read_time):
+        super().__init__()
+        self._start_ticking = start_ticking
+        self._read_time = read_time
+
+    @Value.value.getter
+    def value(self):
+        if self._value is NoValue:
+            # Not ticking yet: report the time of the read itself
+            return self._read_time()
+        return self._value
+
+    def on_value_changed(self, cb, weak=False):
+        self._start_ticking()
+        return super().on_value_changed(cb, weak=weak)
@@ -6,10 +6,17 @@ generic low-level utilities for creating and manipulating them.
 
 import functools
 import sentinel
+import weakref
+
+from contextlib import contextmanager
 
 __names__ = [
     "NoValue",
     "Value",
+    "transaction",
+    "ListValue",
+    "TupleValue",
+    "DictValue",
     "value_list",
     "value_tuple",
     "value_dict",
@@ -22,8 +29,17 @@ __names__ = [
 NoValue = sentinel.create("NoValue")
 """
 A special value indicating that a ``yarp`` value has not been assigned a value.
+
+Always test for it with ``is``/``is not`` (as all internal code does): the
+sentinel is a unique singleton so an identity check is both the fastest and
+the only reliable comparison (``==`` may be intercepted by the value being
+compared).
 """
 
+# When a transaction() is active this holds an (insertion ordered) dict of
+# {id(value): value} for every Value assigned within it; None otherwise.
+_transaction_queue = None
+
 class Value(object):
     """
     A continuous or instantaneous value which can be read and set.
@@ -33,16 +49,34 @@ class Value(object):
     The actual data contained by this object should be regarded as immutable
     with changes being made by replacing the Python object with a new one to
     affect changes.
+
+    If ``distinct`` is True, assignments to :py:attr:`value` which leave it
+    unchanged (by identity or equality) are dropped without raising any
+    callbacks, pruning the whole downstream subtree for idempotent writes.
+    By default every assignment fires, matching :py:func:`no_repeat`-free
+    historical behaviour; :py:meth:`set_instantaneous_value` is always
+    event-like and never filtered.
     """
     
     # Note to developers: The magic methods (e.g. __add__, __getattr__ and
     # __call__) are monkey-patched into this class in the yarp.python_operators
     # module. This is a little bit ugly but makes implementation substantially
     # easier/cleaner.
-    
-    def __init__(self, initial_value = NoValue):
+
+    # No __dict__: reactive graphs are made of a great many Values so the
+    # per-instance saving (and the faster slot-based attribute access) is
+    # worth having.
+    # __weakref__ is included so instances stay weakly referenceable, as
+    # they were before __slots__ removed the instance __dict__.
+    __slots__ = ("_value", "_on_value_changed", "_distinct", "__weakref__")
+
+    def __init__(self, initial_value = NoValue, distinct = False):
         self._value = initial_value
-        self._on_value_changed = []
+        self._distinct = distinct
+        # A tuple, not a list: registration is rare but dispatch is the
+        # hottest path in yarp so we trade a rebuild on registration for a
+        # copy-free iteration on every change.
+        self._on_value_changed = ()
     
     @property
     def value(self):
@@ -68,8 +102,14 @@ class Value(object):
     
     @value.setter
     def value(self, new_value):
+        if self._distinct and (new_value is self._value or
+                               new_value == self._value):
+            return
         self._value = new_value
-        self.set_instantaneous_value(new_value)
+        if _transaction_queue is None:
+            self.set_instantaneous_value(new_value)
+        else:
+            _transaction_queue[id(self)] = self
     
     def set_instantaneous_value(self, new_value):
         """
@@ -77,131 +117,370 @@ class Value(object):
         callbacks with the passed value but not storing it in the
         :py:attr:`value` property (which will remain unchanged).
         """
-        for cb in self._on_value_changed:
-            cb(new_value)
+        callbacks = self._on_value_changed
+        if len(callbacks) == 1:
+            # The single-listener case (a chain of Values) is by far the most
+            # common so skip the iterator machinery entirely.
+            callbacks[0](new_value)
+        elif callbacks:
+            for cb in callbacks:
+                cb(new_value)
     
-    def on_value_changed(self, cb):
+    def on_value_changed(self, cb, weak=False):
         """
         Registers ``callback`` as a callback function to be called when this
         value changes.
-        
+
         The callback function will be called with a single argument: the value
         now held by this object. If the value is continuous, the value given as
         the argument will match the :py:attr:`Value.value` property.
         Otherwise, if this value is instantaneous, the value will not be
         reflected in the :py:attr:`Value.value` property.
-        
+
         .. note::
-        
-            There is no way to remove callbacks. For the moment this is an
-            intentional restriction: if this causes you difficulties this is a
-            good sign what you're doing is 'serious' enough that ``yarp`` is
-            not for you.
-        
+
+            There is no way to explicitly remove callbacks. For the moment
+            this is an intentional restriction: if this causes you
+            difficulties this is a good sign what you're doing is 'serious'
+            enough that ``yarp`` is not for you.
+
+        However, if ``weak`` is True, the callback is held by weak reference
+        and silently dropped once the callback (or, for a bound method, its
+        object) is garbage collected. This suits long-lived Values observed
+        by shorter-lived consumers; note that with a ``weak`` registration
+        *something else* must keep the callback alive for it to keep firing.
+
         This function returns the callback passed to it making it possible to
         use it as a decorator if desired.
         """
-        self._on_value_changed.append(cb)
+        if weak:
+            def remove(_ref):
+                self._on_value_changed = tuple(
+                    c for c in self._on_value_changed if c is not wrapper)
+
+            try:
+                ref = weakref.WeakMethod(cb, remove)
+            except TypeError:
+                ref = weakref.ref(cb, remove)
+
+            def wrapper(new_value):
+                target = ref()
+                if target is not None:
+                    target(new_value)
+
+            self._on_value_changed = self._on_value_changed + (wrapper,)
+        else:
+            self._on_value_changed = self._on_value_changed + (cb,)
         return cb
     
     def __repr__(self):
-        return "Value({})".format(repr(self.value))
+        return "{}({})".format(type(self).__name__, repr(self.value))
     
     def __str__(self):
         return repr(self)
 
+class ListValue(Value):
+    r"""
+    A :py:class:`Value` consisting of a fixed list of other
+    :py:class:`Values <Value>`, changing whenever one of its members does.
+
+    See :py:func:`value_list` for the usual way of constructing these.
+
+    The held list is patched in place when a member changes (an O(1)
+    update); the full-list snapshot passed to :py:meth:`on_value_changed`
+    callbacks is only built if such a callback is actually registered.
+    Downstream consumers which can apply single-element updates should
+    subscribe via :py:meth:`on_patch` instead and pay a constant cost per
+    change regardless of the list length.
+    """
+
+    __slots__ = ("_list_of_values", "_on_patch")
+
+    def __init__(self, list_of_values):
+        self._list_of_values = list(list_of_values)
+        super().__init__([v.value for v in self._list_of_values])
+        self._on_patch = ()
+        for i, value in enumerate(self._list_of_values):
+            value.on_value_changed(functools.partial(self._element_changed, i))
+
+    def on_patch(self, cb):
+        """
+        Registers ``cb`` as a callback function to be called with
+        ``(index, new_value)`` whenever a member of this list changes.
+
+        Unlike :py:meth:`on_value_changed` (whose callbacks receive a fresh
+        snapshot of the whole list) this costs O(1) per change. The same
+        caveats apply as for :py:meth:`Value.on_value_changed`; the callback
+        is returned so this may be used as a decorator.
+        """
+        self._on_patch = self._on_patch + (cb,)
+        return cb
+
+    def _element_changed(self, index, new_value):
+        """Internal. Propagate a change to the index'th member."""
+        # Direct slot reads (._value) rather than the .value property, with
+        # the held list bound to a local: this runs for every change of every
+        # member so the descriptor call and repeated slot loads are worth
+        # skipping.
+        value = self._value
+        value[index] = self._list_of_values[index]._value
+
+        for cb in self._on_patch:
+            cb(index, new_value)
+
+        if self._on_value_changed:
+            # Substitute in the instantaneous value of the changed element.
+            # The copy keeps the emitted snapshot independent of the held
+            # list, which continues to be patched in place.
+            instantaneous_value = value.copy()
+            instantaneous_value[index] = new_value
+            self.set_instantaneous_value(instantaneous_value)
+
+
+class TupleValue(Value):
+    r"""
+    A :py:class:`Value` consisting of a fixed tuple of other
+    :py:class:`Values <Value>`, changing whenever one of its members does.
+
+    See :py:func:`value_tuple` for the usual way of constructing these.
+
+    As for :py:class:`ListValue`, an O(1) per-change subscription is
+    available via :py:meth:`on_patch`; the full-tuple rebuild is only
+    performed for :py:meth:`on_value_changed` subscribers. While no such
+    subscriber exists the rebuild is deferred entirely until
+    :py:attr:`value` is next read.
+    """
+
+    __slots__ = ("_tuple_of_values", "_on_patch", "_dirty")
+
+    def __init__(self, tuple_of_values):
+        self._tuple_of_values = tuple(tuple_of_values)
+        super().__init__(tuple(v.value for v in self._tuple_of_values))
+        self._on_patch = ()
+        self._dirty = False
+        for i, value in enumerate(self._tuple_of_values):
+            value.on_value_changed(functools.partial(self._element_changed, i))
+
+    @Value.value.getter
+    def value(self):
+        # Materialize any rebuild deferred while nobody was subscribed
+        if self._dirty:
+            self._dirty = False
+            self._value = tuple(v._value for v in self._tuple_of_values)
+        return self._value
+
+    def on_patch(self, cb):
+        """
+        Registers ``cb`` to be called with ``(index, new_value)`` whenever a
+        member of this tuple changes. See :py:meth:`ListValue.on_patch`.
+        """
+        self._on_patch = self._on_patch + (cb,)
+        return cb
+
+    def _element_changed(self, index, new_value):
+        """Internal. Propagate a change to the index'th member."""
+        for cb in self._on_patch:
+            cb(index, new_value)
+
+        if self._on_value_changed:
+            value = self._value
+            if self._dirty:
+                # Catch up on a rebuild deferred while nobody was subscribed
+                self._dirty = False
+                value = self._value = tuple(
+                    v._value for v in self._tuple_of_values)
+            else:
+                # Only the changed element differs: splice it in with
+                # C-level slicing rather than walking every member
+                value = self._value = (
+                    value[:index]
+                    + (self._tuple_of_values[index]._value,)
+                    + value[index + 1:])
+
+            # Substitute in the instantaneous value of the changed element
+            # (for persistent changes it already is the stored element, so
+            # the freshly built tuple can be passed on as-is)
+            if new_value is value[index]:
+                instantaneous_value = value
+            else:
+                instantaneous_value = (
+                    value[:index] + (new_value,) + value[index + 1:])
+            self.set_instantaneous_value(instantaneous_value)
+        else:
+            # Nobody is watching: defer the O(N) rebuild until .value is
+            # next read.
+            self._dirty = True
+
+
+class DictValue(Value):
+    r"""
+    A :py:class:`Value` consisting of a fixed dictionary whose values (but
+    not keys) are other :py:class:`Values <Value>`, changing whenever one of
+    them does.
+
+    See :py:func:`value_dict` for the usual way of constructing these.
+
+    As for :py:class:`ListValue`, the held dictionary is patched in place
+    (O(1) per change), snapshots are built only for
+    :py:meth:`on_value_changed` subscribers and an O(1) ``(key, new_value)``
+    subscription is available via :py:meth:`on_patch`.
+    """
+
+    __slots__ = ("_dict_of_values", "_on_patch")
+
+    def __init__(self, dict_of_values):
+        self._dict_of_values = dict(dict_of_values)
+        super().__init__({k: v.value for k, v in self._dict_of_values.items()})
+        self._on_patch = ()
+        for key, value in self._dict_of_values.items():
+            value.on_value_changed(
+                functools.partial(self._element_changed, key))
+
+    def on_patch(self, cb):
+        """
+        Registers ``cb`` to be called with ``(key, new_value)`` whenever a
+        member of this dictionary changes. See :py:meth:`ListValue.on_patch`.
+        """
+        self._on_patch = self._on_patch + (cb,)
+        return cb
+
+    def _element_changed(self, key, new_value):
+        """Internal. Propagate a change to the value under ``key``."""
+        # As in ListValue: slot reads and a local binding of the held dict
+        value = self._value
+        value[key] = self._dict_of_values[key]._value
+
+        for cb in self._on_patch:
+            cb(key, new_value)
+
+        if self._on_value_changed:
+            instantaneous_value = value.copy()
+            instantaneous_value[key] = new_value
+            self.set_instantaneous_value(instantaneous_value)
+
+
+@contextmanager
+def transaction():
+    r"""
+    Context manager which batches up changes to :py:class:`Value`\ s.
+
+    While the block is active, assignments to :py:attr:`Value.value` update
+    the stored value immediately but raise no callbacks. When the outermost
+    block exits each changed :py:class:`Value` raises its callbacks exactly
+    once with its final value, in the order the Values were first assigned.
+    This collapses a burst of writes into a single traversal of each
+    affected downstream subtree rather than one per write::
+
+        >>> with yarp.transaction():
+        ...     a.value = 1
+        ...     a.value = 2
+        ...     b.value = 3
+        ... # Here a's callbacks fire once (with 2), then b's (with 3).
+
+    Aggregates such as :py:func:`value_list` consequently emit once per
+    changed member rather than once per write.
+
+    Instantaneous values (:py:meth:`Value.set_instantaneous_value`) are
+    events rather than state and are never deferred. Transactions may be
+    nested; only the outermost block flushes. The flush also runs if the
+    block raises, since the stored values have already been updated.
+
+    The flush proceeds in rounds: assignments made *by* the flushed
+    callbacks (e.g. a :py:func:`fn`-wrapped function recomputed once per
+    changed argument) are gathered into a follow-up round rather than
+    propagating immediately. A derived Value whose inputs both changed in
+    the transaction therefore raises its own callbacks once, with the final
+    value, instead of once per input — transient 'glitch' states never
+    escape downstream.
+    """
+    global _transaction_queue
+    if _transaction_queue is not None:
+        # Nested transaction: changes simply join the outermost one
+        yield
+        return
+
+    _transaction_queue = {}
+    try:
+        yield
+    finally:
+        try:
+            queue = _transaction_queue
+            while queue:
+                # Writes made by the callbacks below land in a fresh queue
+                # and are flushed in the next round, coalescing cascaded
+                # updates.
+                _transaction_queue = {}
+                for value in queue.values():
+                    value.set_instantaneous_value(value._value)
+                queue = _transaction_queue
+        finally:
+            # Restore even if a flushed callback raises: a stale queue here
+            # would silently swallow every later Value assignment.
+            _transaction_queue = None
+
+
 def value_list(list_of_values):
     r"""
     Returns a :py:class:`Value` consisting of a fixed list of other
     :py:class:`Values <Value>`. The returned :py:class:`Value` will change
     whenever one of its members does.
-    
+
     Parameters
     ----------
     list_of_values: [:py:class:`Value`, ...]
         A fixed list of :py:class:`Value`\ s. The :py:attr:`value` of this
         object will be an array of the underlying values. Callbacks will be
         raised whenever a value in the list changes.
-        
+
         It is not possible to modify the list or set the contained values
         directly from this object.
-        
+
         For instantaneous list members, the instantaneous value will be
         present in the version of this list passed to registered callbacks
         but otherwise not retained. (Typically the instantaneous values
         will be represented by :py:class:`NoValue` in :py:attr:`value` or
         in callbacks resulting from other :py:class:`Value`\ s changing.
     """
-    output_value = Value([v.value for v in list_of_values])
-    
-    def element_changed(index, new_value):
-        output_value._value[index] = list_of_values[index].value
-        
-        # Substitute in the instantaneous value of the changed element
-        instantaneous_value = output_value.value.copy()
-        instantaneous_value[index] = new_value
-        
-        output_value.set_instantaneous_value(instantaneous_value)
-    
-    for i, value in enumerate(list_of_values):
-        value.on_value_changed(functools.partial(element_changed, i))
-    
-    return output_value
+    return ListValue(list_of_values)
 
 def value_tuple(tuple_of_values):
     r"""
     A :py:class:`Value` consisting of a tuple of other :py:class:`Values
     <Value>`.
-    
+
     Parameters
     ----------
     tuple_of_values: (:py:class:`Value`, ...)
         A fixed tuple of :py:class:`Value`\ s. The :py:attr:`value` of this
         object will be a tuple of the underlying values. Callbacks will be
         raised whenever a value in the tuple changes.
-        
+
         It is not possible to modify the tuple or set the contained values
         directly from this object.
-        
+
         For instantaneous tuple members, the instantaneous value will be
         present in the version of this tuple passed to registered callbacks
         but otherwise not retained. (Typically the instantaneous values
         will be represented by :py:class:`NoValue` in :py:attr:`value` or
         in callbacks resulting from other :py:class:`Value`\ s changing.
     """
-    output_value = Value(tuple(v.value for v in tuple_of_values))
-    
-    def element_changed(index, new_value):
-        output_value._value = tuple(v.value for v in tuple_of_values)
-        
-        # Substitute in the instantaneous value of the changed element
-        instantaneous_value = tuple(
-            v.value if i != index else new_value
-            for i, v in enumerate(tuple_of_values)
-        )
-        
-        output_value.set_instantaneous_value(instantaneous_value)
-    
-    for i, value in enumerate(tuple_of_values):
-        value.on_value_changed(functools.partial(element_changed, i))
-    
-    return output_value
+    return TupleValue(tuple_of_values)
 
 def value_dict(dict_of_values):
     r"""
     A :py:class:`Value` consisting of a dictionary where the values (but not
     keys) are  :py:class:`Values <Value>`.
-    
+
     Parameters
     ----------
     dict_of_values: {key: :py:class:`Value`, ...}
         A fixed dictionary of :py:class:`Value`\ s. The :py:attr:`value` of this
         object will be a dictionary of the underlying values. Callbacks will be
         raised whenever a value in the dictionary changes.
-        
+
         It is not possible to modify the set of keys in the dictionary nor
         directly change the values of its elements from this object.
-        
+
         For instantaneous dictionary members, the instantaneous value will
         be present in the version of this dict passed to registered
         callbacks but otherwise not retained. (Typically the instantaneous
@@ -209,20 +488,7 @@ def value_dict(dict_of_values):
         :py:attr:`value` or in callbacks resulting from other
         :py:class:`Value`\ s changing.
     """
-    output_value = Value({k: v.value for k, v in dict_of_values.items()})
-    
-    def element_changed(key, new_value):
-        output_value._value[key] = dict_of_values[key].value
-        
-        instantaneous_value = output_value.value.copy()
-        instantaneous_value[key] = new_value
-        
-        output_value.set_instantaneous_value(instantaneous_value)
-    
-    for key, value in dict_of_values.items():
-        value.on_value_changed(functools.partial(element_changed, key))
-    
-    return output_value
+    return DictValue(dict_of_values)
 
 def ensure_value(value):
     """Ensure a variable is a :py:class:`Value` object, wrapping it accordingly
@@ -235,7 +501,20 @@ def ensure_value(value):
     * If any other type, wraps the variable in a continous :py:class:`Value`
       with the initial value set to the defined value.
     """
-    if isinstance(value, Value):
+    # Exact-type tests first: the overwhelmingly common cases dispatch on a
+    # single pointer compare rather than an isinstance MRO walk. Subclasses
+    # (including yarp's own Value subclasses) fall through to the isinstance
+    # checks below.
+    t = type(value)
+    if t is Value:
+        return value
+    elif t is list:
+        return value_list([ensure_value(v) for v in value])
+    elif t is tuple:
+        return value_tuple(tuple(ensure_value(v) for v in value))
+    elif t is dict:
+        return value_dict({k: ensure_value(v) for k, v in value.items()})
+    elif isinstance(value, Value):
         return value
     elif isinstance(value, list):
         return value_list([ensure_value(v) for v in value])
@@ -266,6 +545,10 @@ def make_persistent(source_value, initial_value=NoValue):
     
     @source_value.on_value_changed
     def on_source_value_changed(new_value):
-        output_value.value = new_value
-    
+        # Store-then-fire inline rather than through the .value property:
+        # this node forwards every change and never defers, so the
+        # descriptor dispatch is pure overhead on a per-event path.
+        output_value._value = new_value
+        output_value.set_instantaneous_value(new_value)
+
     return output_value